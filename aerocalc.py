@@ -1,60 +1,191 @@
+import io
 import math
+from collections import namedtuple
+from functools import lru_cache
 import numpy as np
+from matplotlib.figure import Figure
 import streamlit as st
 
 
 # === Core Functions ===
+GammaConsts = namedtuple('GammaConsts', ['half_gm1', 'g_over_gm1', 'one_over_gm1',
+                                         'area_exp', 'two_over_gp1', 'area_coef'])
+
+@lru_cache(maxsize=None)
+def _gamma_consts(gamma):
+    area_exp = (gamma + 1) / (2 * (gamma - 1))
+    two_over_gp1 = 2 / (gamma + 1)
+    return GammaConsts(half_gm1=(gamma - 1) / 2,
+                       g_over_gm1=gamma / (gamma - 1),
+                       one_over_gm1=1 / (gamma - 1),
+                       area_exp=area_exp,
+                       two_over_gp1=two_over_gp1,
+                       area_coef=two_over_gp1 ** area_exp)
+
 def T0_over_T(M, gamma):
-    return 1 + (gamma - 1) / 2 * M ** 2
+    M = np.asarray(M, dtype=float)
+    return 1 + _gamma_consts(gamma).half_gm1 * M ** 2
 
 def P0_over_P(M, gamma):
-    return T0_over_T(M, gamma) ** (gamma / (gamma - 1))
+    return T0_over_T(M, gamma) ** _gamma_consts(gamma).g_over_gm1
 
 def rho0_over_rho(M, gamma):
-    return T0_over_T(M, gamma) ** (1 / (gamma - 1))
+    return T0_over_T(M, gamma) ** _gamma_consts(gamma).one_over_gm1
 
 def A_over_Astar(M, gamma):
-    term = (2 / (gamma + 1)) * T0_over_T(M, gamma)
-    exponent = (gamma + 1) / (2 * (gamma - 1))
-    return (1 / M) * term ** exponent
+    M = np.asarray(M, dtype=float)
+    g = _gamma_consts(gamma)
+    # M = 0 is the stagnation limit, where A/A* is infinite
+    with np.errstate(divide='ignore'):
+        return (1 / M) * (g.two_over_gp1 * T0_over_T(M, gamma)) ** g.area_exp
+
+def _ratios(M, gamma):
+    M = np.asarray(M, dtype=float)
+    g = _gamma_consts(gamma)
+    T0T = 1 + g.half_gm1 * M * M
+    rho0rho = T0T ** g.one_over_gm1
+    # T0T**(gamma/(gamma-1)) and the A/A* power are both built from rho0rho;
+    # area_exp = one_over_gm1 + 1/2, and sqrt(T0T)/M stays bounded
+    P0P = rho0rho * T0T
+    with np.errstate(divide='ignore'):
+        AAstar = g.area_coef * rho0rho * (np.sqrt(T0T) / M)
+    return T0T, P0P, rho0rho, AAstar
+
+def AAstar_newton_step(log_M, log_target, gamma):
+    # Newton step on log(A/A*) - log(target) in log M, with slope
+    # (M^2 - 1) / T0T. Everything stays in logs (s = half_gm1*M^2/T0T) so
+    # that large supersonic targets cannot overflow M^2 or the power.
+    g = _gamma_consts(gamma)
+    z = 2 * log_M + np.log(g.half_gm1)
+    s = 1 / (1 + np.exp(-z))
+    residual = (g.area_exp * (np.log(g.two_over_gp1) + np.logaddexp(0, z))
+                - log_M - log_target)
+    return residual / (s / g.half_gm1 - (1 - s))
+
+@lru_cache(maxsize=None)
+def build_table(gamma, n=1000):
+    M_grid = np.concatenate([np.geomspace(1e-4, 1, n), np.geomspace(1, 50, n)[1:]])
+    table = (M_grid, *_ratios(M_grid, gamma))
+    # Shared by every caller through the cache, so keep it immutable
+    for arr in table:
+        arr.setflags(write=False)
+    return table
 
-def solve_bisection(f, target, low, high, tol=1e-10, max_iter=200):
+def solve_modAB(f, target, low, high, tol=1e-12, max_iter=None):
     a, b = low, high
     fa, fb = f(a) - target, f(b) - target
     if fa * fb > 0:
         return float('nan')
+    if max_iter is None:
+        # bisection count to shrink [low, high] below tol, plus a small margin
+        max_iter = int(math.log2(max(high - low, tol) / tol)) + 4
+    side = 0
+    bisection = True
     for _ in range(max_iter):
-        mid = 0.5 * (a + b)
-        fm = f(mid) - target
-        if abs(fm) < tol:
-            return mid
-        if fa * fm <= 0:
-            b, fb = mid, fm
+        if bisection:
+            c = 0.5 * (a + b)
+            fc = f(c) - target
+            fm = 0.5 * (fa + fb)
+            # switch to false position once the function looks linear on [a, b]
+            if abs(fm - fc) < 0.25 * (abs(fm) + abs(fc)):
+                bisection = False
         else:
-            a, fa = mid, fm
+            c = (a * fb - b * fa) / (fb - fa)
+            fc = f(c) - target
+        if fc == 0 or b - a < tol * (1 + abs(c)):
+            return c
+        if fa * fc > 0:
+            if side == 1:
+                m = 1 - fc / fa
+                fb = fb * m if m > 0 else 0.5 * fb
+            elif not bisection:
+                side = 1
+            a, fa = c, fc
+        else:
+            if side == -1:
+                m = 1 - fc / fb
+                fa = fa * m if m > 0 else 0.5 * fa
+            elif not bisection:
+                side = -1
+            b, fb = c, fc
     return 0.5 * (a + b)
 
+def solve_newton(step, x0, tol=1e-12, max_iter=50):
+    x = x0
+    for _ in range(max_iter):
+        dx = step(x)
+        x = x - dx
+        if np.all(np.abs(dx) <= tol):
+            return x, True
+    return x, False
+
 def mach_from_T0T(T0T, gamma):
-    if T0T < 1:
-        return float('nan')
-    return math.sqrt((2 / (gamma - 1)) * (T0T - 1))
+    T0T = np.asarray(T0T, dtype=float)
+    M = np.sqrt((np.maximum(T0T, 1) - 1) / _gamma_consts(gamma).half_gm1)
+    return np.where(T0T < 1, np.nan, M)[()]
 
 def mach_from_P0P(P0P, gamma):
-    f = lambda M: P0_over_P(M, gamma)
-    return solve_bisection(f, P0P, 1e-8, 50)
+    P0P = np.maximum(np.asarray(P0P, dtype=float), 0)
+    return mach_from_T0T(P0P ** (1 / _gamma_consts(gamma).g_over_gm1), gamma)
 
 def mach_from_rho0rho(rho0rho, gamma):
-    f = lambda M: rho0_over_rho(M, gamma)
-    return solve_bisection(f, rho0rho, 1e-8, 50)
+    rho0rho = np.maximum(np.asarray(rho0rho, dtype=float), 0)
+    return mach_from_T0T(rho0rho ** (gamma - 1), gamma)
+
+def log_mach_guess_AAstar(log_Aa, gamma, branch="subsonic"):
+    # Leading-order A/A* asymptotes (M -> 0 and M -> inf); both overestimate
+    # A/A*, so Newton starts on the side where it converges monotonically.
+    # Taken in logs, since half_gm1**area_exp underflows for gamma near 1.
+    g = _gamma_consts(gamma)
+    log_coef = g.area_exp * np.log(g.two_over_gp1)
+    if branch == "subsonic":
+        return log_coef - log_Aa
+    return g.half_gm1 * (log_Aa - log_coef - g.area_exp * np.log(g.half_gm1))
 
 def mach_from_AAstar(Aa, gamma, branch="subsonic"):
-    if Aa < 1:
+    if np.ndim(Aa) > 0:
+        Aa = np.asarray(Aa, dtype=float)
+        # A/A* = 1 is a double root at the throat, where Newton stalls
+        valid = (Aa > 1) & np.isfinite(Aa)
+        target = np.where(valid, Aa, 2.0)
+        # Newton in log M on log(A/A*), which is convex there on both branches
+        log_target = np.log(target)
+        with np.errstate(over='ignore', invalid='ignore'):
+            log_M, _ = solve_newton(lambda x: AAstar_newton_step(x, log_target, gamma),
+                                    log_mach_guess_AAstar(log_target, gamma, branch))
+        M = np.exp(log_M)
+        return np.where(valid, M, np.where(Aa == 1, 1.0, np.nan))
+    Aa = float(Aa)
+    if Aa < 1 or not math.isfinite(Aa):
         return float('nan')
-    f = lambda M: A_over_Astar(M, gamma)
+    if Aa == 1:
+        return 1.0
+    # Same log-space Newton as the array path, capped for the near-throat
+    # double root where it only converges linearly
+    log_Aa = math.log(Aa)
+    with np.errstate(over='ignore', invalid='ignore'):
+        log_M, converged = solve_newton(lambda x: AAstar_newton_step(x, log_Aa, gamma),
+                                        log_mach_guess_AAstar(log_Aa, gamma, branch),
+                                        max_iter=8)
+    if converged:
+        return float(np.exp(log_M))
+    # Scalar A/A* kernel with the gamma constants bound once, for the
+    # bracketing fallback
+    g = _gamma_consts(gamma)
+    c, k, exponent = g.two_over_gp1, g.half_gm1, g.area_exp
+    f = lambda M: (c * (1 + k * M * M)) ** exponent / M
+    M_grid, _, _, _, AAstar = build_table(gamma)
+    n = (len(M_grid) + 1) // 2
+    # Bracket the root between neighbouring table points before refining
     if branch == "subsonic":
-        return solve_bisection(f, Aa, 1e-8, 1 - 1e-8)
+        i = np.searchsorted(-AAstar[:n], -Aa)
+        low = M_grid[i - 1] if i > 0 else 1e-8
+        high = M_grid[min(i, n - 1)]
     else:
-        return solve_bisection(f, Aa, 1 + 1e-8, 50)
+        i = np.searchsorted(AAstar[n - 1:], Aa) + n - 1
+        low = M_grid[max(i - 1, n - 1)]
+        high = M_grid[min(i, len(M_grid) - 1)]
+    return solve_modAB(f, Aa, float(low), float(high))
 
 def isentropic_calculator(input_type, input_value, gamma=1.4, branch="subsonic"):
     if input_type == "Mach":
@@ -70,15 +201,16 @@ def isentropic_calculator(input_type, input_value, gamma=1.4, branch="subsonic")
     else:
         return None
 
-    if not math.isfinite(M):
+    if np.ndim(M) == 0 and not math.isfinite(M):
         return None
 
+    T0T, P0P, rho0rho, AAstar = _ratios(M, gamma)
     return {
         'Mach': M,
-        'T0/T': T0_over_T(M, gamma),
-        'P0/P': P0_over_P(M, gamma),
-        'ρ0/ρ': rho0_over_rho(M, gamma),
-        'A/A*': A_over_Astar(M, gamma)
+        'T0/T': T0T,
+        'P0/P': P0P,
+        'ρ0/ρ': rho0rho,
+        'A/A*': AAstar
     }
 
 # === Streamlit UI ===
@@ -120,14 +252,70 @@ input_value = st.number_input(f"Enter value for {input_type}", value=2.0, min_va
 branch = "subsonic"
 if input_type == "A/A*":
     branch = st.radio("Flow Regime", ["subsonic", "supersonic"], horizontal=True)
+compare_text = st.text_input(f"Compare other {input_type} values (comma-separated, optional)", "")
+
+@st.cache_data
+def make_curves(gamma):
+    # Property ratios across Mach on an even grid for plotting; only gamma
+    # changes them, the per-click Mach line is drawn in build_plot
+    M_vals = np.linspace(0.1, 5, 200)
+    return (M_vals, *_ratios(M_vals, gamma))
+
+@st.cache_data(max_entries=32)
+def build_plot(gamma, mach, input_type="Mach", compare_M=None, compare_values=None):
+    M_vals, T0T, P_vals, rho_vals, A_vals = make_curves(gamma)
+
+    # Figure rather than pyplot, so nothing is left in pyplot's registry
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    ax.plot(M_vals, T0T, label="T0/T")
+    ax.plot(M_vals, P_vals, label="P0/P")
+    ax.plot(M_vals, rho_vals, label="ρ0/ρ")
+    ax.plot(M_vals, A_vals, label="A/A*")
+    ax.axvline(mach, color="#FF6600", linestyle="--", label=f"M = {mach:.3f}")
+    if compare_M is not None:
+        for M_c, value_c in zip(compare_M, compare_values):
+            if input_type == "Mach":
+                ax.axvline(M_c, color="white", linestyle=":", alpha=0.7)
+            else:
+                ax.axhline(value_c, color="white", linestyle=":", alpha=0.7)
+        if input_type != "Mach":
+            ax.plot(compare_M, compare_values, "o", color="white", label=f"Other {input_type}")
+    ax.set_yscale("log")
+    ax.set_xlabel("Mach")
+    ax.set_ylabel("Ratio")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend()
+
+    # Cache the rendered PNG: rasterizing is most of the plot cost
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    return buf.getvalue()
 
 if st.button("Calculate"):
     result = isentropic_calculator(input_type, input_value, gamma, branch)
     if result:
+        # Extra targets are solved in one vectorized call
+        compare, bad_compare = None, False
+        if compare_text.strip():
+            try:
+                targets = np.array([float(v) for v in compare_text.replace(",", " ").split()])
+            except ValueError:
+                bad_compare = True
+            else:
+                compare = isentropic_calculator(input_type, targets, gamma, branch)
+
         st.success("Calculation Successful ✅")
         st.write("### Results:")
-        for key, value in result.items():
-            st.write(f"**{key}:** {value:.6f}")
-
+        st.markdown("\n\n".join(f"**{key}:** {value:.6f}" for key, value in result.items()))
 
+        if bad_compare:
+            st.warning("Comparison values must be numbers separated by commas.")
+        elif compare is not None:
+            st.dataframe(compare)
 
+        # The numbers above are already on the page while the plot renders
+        if compare is None:
+            st.image(build_plot(gamma, result['Mach'], input_type))
+        else:
+            st.image(build_plot(gamma, result['Mach'], input_type, compare['Mach'], compare[input_type]))